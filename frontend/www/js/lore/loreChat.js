@@ -694,6 +694,12 @@ async function sendMessage(text, source = 'text_entry') {
                                 updateStreamingStatus('Searching the Archives...');
                                 logTiming(requestId, 'search_complete', t_send);
                             }
+                        } else if (chunk.meta.phase === 'queued') {
+                            const position = chunk.meta.queue_position;
+                            updateStreamingStatus(position > 1
+                                ? `The Lore Keeper is attending to others — you are number ${position} in line...`
+                                : 'The Lore Keeper will attend to you next...');
+                            logTiming(requestId, 'queued', t_send, `position=${position}`);
                         }
                         continue;
                     }
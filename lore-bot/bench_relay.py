@@ -0,0 +1,171 @@
+"""
+bench_relay.py
+==============
+Measures the chat stream relay (server.StreamRelay) against a fake Ollama that
+streams NDJSON chunks as fast as a real GPU box never could.
+
+Each mode relays the same upstream stream through httpx, exactly as
+/api/chat does, and reports CPU time, frames and bytes sent to the browser,
+and how late the relay delivered tokens compared with when Ollama produced them.
+
+Modes:
+    per_chunk_json   one frame per Ollama chunk, stdlib json (the old relay)
+    per_chunk        one frame per chunk, the server's codec (orjson when installed)
+    coalesced        the server's settings (LORE_BOT_STREAM_FLUSH_MS / _CHARS)
+
+Usage:
+    python bench_relay.py                      # 20k tokens at 5000 tokens/s
+    python bench_relay.py --rate 0             # unthrottled: raw relay throughput
+    python bench_relay.py --tokens 50000 --rate 2000 --flush-ms 50 --json results.json
+
+Runs fully offline; no Ollama or Supabase needed.
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+
+import httpx
+
+import server
+
+# ---------------------------------------------------------------------------
+# Fake upstream
+# ---------------------------------------------------------------------------
+
+WORDS = ("The ", "Redeemers ", "walked ", "the ", "Haunted ", "Lands ", "before ", "the ", "Tenth ", "Creation", ". ")
+
+
+class FakeOllamaStream(httpx.AsyncByteStream):
+    """Yields Ollama chat chunks at `rate` tokens/s (0 = as fast as possible).
+
+    Tokens due since the last tick are sent in one network chunk, the way a
+    socket read delivers several lines at once. emitted[i] is when token i left.
+    """
+
+    def __init__(self, tokens: int, rate: float):
+        self.tokens = tokens
+        self.rate = rate
+        self.emitted: list[float] = []
+
+    async def __aiter__(self):
+        start = time.perf_counter()
+        sent = 0
+        while sent < self.tokens:
+            if self.rate:
+                due = min(self.tokens, int((time.perf_counter() - start) * self.rate) + 1)
+            else:
+                due = min(self.tokens, sent + 64)
+            lines = []
+            now = time.perf_counter()
+            for i in range(sent, due):
+                lines.append(json.dumps({
+                    "model": "qwen2.5:14b",
+                    "created_at": "2026-01-01T00:00:00.000000Z",
+                    "message": {"role": "assistant", "content": WORDS[i % len(WORDS)]},
+                    "done": False,
+                }))
+                self.emitted.append(now)
+            sent = due
+            if lines:
+                yield ("\n".join(lines) + "\n").encode()
+            await asyncio.sleep(0.001 if self.rate else 0)
+        yield (json.dumps({
+            "model": "qwen2.5:14b",
+            "message": {"role": "assistant", "content": ""},
+            "done": True,
+            "prompt_eval_count": 4000,
+            "eval_count": self.tokens,
+        }) + "\n").encode()
+
+
+def encode_json_frame(content: str, done: bool) -> str:
+    return json.dumps({"content": content, "done": done}) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+async def run_mode(name: str, tokens: int, rate: float, relay: server.StreamRelay) -> dict:
+    upstream = FakeOllamaStream(tokens, rate)
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, stream=upstream))
+    lags_ms: list[float] = []
+    frames = 0
+    sent_bytes = 0
+    delivered = 0
+    async with httpx.AsyncClient(transport=transport, base_url="http://fake-ollama") as client:
+        t_start = time.perf_counter()
+        cpu_start = time.process_time()
+        async with client.stream("POST", "/api/chat", json={}) as resp:
+            async for frame in relay.frames(resp.aiter_lines()):
+                now = time.perf_counter()
+                frames += 1
+                sent_bytes += len(frame.encode())
+                if relay.token_count > delivered:
+                    # The oldest token in this frame waited longest.
+                    lags_ms.append((now - upstream.emitted[delivered]) * 1000)
+                    delivered = relay.token_count
+        cpu_ms = (time.process_time() - cpu_start) * 1000
+        wall_s = time.perf_counter() - t_start
+
+    assert relay.final_chunk is not None and relay.token_count == tokens, "relay lost tokens"
+    lags_ms.sort()
+    return {
+        "mode": name,
+        "tokens": tokens,
+        "frames": frames,
+        "bytes": sent_bytes,
+        "wall_s": round(wall_s, 3),
+        "tokens_per_s": round(tokens / wall_s),
+        "cpu_ms": round(cpu_ms, 1),
+        "cpu_us_per_token": round(cpu_ms * 1000 / tokens, 2),
+        "lag_p50_ms": round(statistics.median(lags_ms), 2),
+        "lag_p99_ms": round(lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.99))], 2),
+        "lag_max_ms": round(lags_ms[-1], 2),
+    }
+
+
+async def run(args) -> list[dict]:
+    modes = [
+        ("per_chunk_json", server.StreamRelay(flush_ms=0, loads=json.loads, encode=encode_json_frame)),
+        ("per_chunk", server.StreamRelay(flush_ms=0)),
+        ("coalesced", server.StreamRelay(flush_ms=args.flush_ms, flush_chars=args.flush_chars)),
+    ]
+    results = []
+    for name, relay in modes:
+        results.append(await run_mode(name, args.tokens, args.rate, relay))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the NDJSON stream relay against a fake Ollama.")
+    parser.add_argument("--tokens", type=int, default=20000)
+    parser.add_argument("--rate", type=float, default=5000, help="upstream tokens per second (0 = unthrottled)")
+    parser.add_argument("--flush-ms", type=float, default=server.STREAM_FLUSH_MS)
+    parser.add_argument("--flush-chars", type=int, default=server.STREAM_FLUSH_CHARS)
+    parser.add_argument("--json", metavar="PATH", help="also write the results to PATH")
+    args = parser.parse_args()
+
+    print(f"[INFO] {args.tokens} tokens at {args.rate or 'unthrottled'} tokens/s, codec {server.STREAM_CODEC}, "
+          f"flush {args.flush_ms:g}ms / {args.flush_chars} chars")
+    results = asyncio.run(run(args))
+
+    columns = ("mode", "frames", "bytes", "tokens_per_s", "cpu_ms", "cpu_us_per_token",
+               "lag_p50_ms", "lag_p99_ms", "lag_max_ms")
+    widths = [max(len(c), *(len(str(r[c])) for r in results)) for c in columns]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    for r in results:
+        print("  ".join(str(r[c]).ljust(w) for c, w in zip(columns, widths)))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"codec": server.STREAM_CODEC, "rate": args.rate, "results": results}, f, indent=2)
+        print(f"[INFO] Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
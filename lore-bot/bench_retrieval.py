@@ -0,0 +1,357 @@
+"""
+bench_retrieval.py
+==================
+Times each retrieval stage of server.py on synthetic corpora, fully offline.
+
+For every corpus size a synthetic lore_items table (random embeddings, made-up
+titles, categories and text) is indexed with build_lore_index(), then each stage
+runs in isolation over a fixed set of queries:
+
+    search_vector                     exact (or IVF, with --ann) cosine search
+    search_tfidf                      BM25 keyword search
+    keyword_inject                    keyword lookup + injection into vector results
+    prioritize_exact_keyword_matches  keyword lookup + reordering
+    get_category_flood_entries        category name matching
+    build_rag_prompt                  the whole pipeline, embedding call stubbed
+
+Per stage it records mean / p50 / p95 ms per call and the peak Python allocation
+of one call (tracemalloc); per corpus the build time, index memory breakdown and
+process RSS.
+
+Usage:
+    python bench_retrieval.py                                   # 100, 1k, 10k, 100k entries
+    python bench_retrieval.py --sizes 1000,10000 --json results.json
+    python bench_retrieval.py --save-baseline bench_baseline.json
+    python bench_retrieval.py --baseline bench_baseline.json    # exit 1 on regression
+    python bench_retrieval.py --ann                             # search_vector through the IVF index
+
+A stage regresses when its p50 is more than --tolerance (default 25%) above the
+baseline and at least --min-delta-ms slower; index memory regresses beyond
+--memory-tolerance. Baselines only compare meaningfully on the same machine, so
+none is committed: save one with --save-baseline before changing retrieval code.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import importlib
+import tempfile
+import statistics
+import tracemalloc
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+# server.py reads its configuration at import, so it is imported by load_server()
+# once main() knows the settings, never when this module is imported.
+server = None
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark the lore-bot retrieval stages on synthetic corpora.")
+    parser.add_argument("--sizes", default="100,1000,10000,100000", help="comma-separated corpus sizes")
+    parser.add_argument("--dim", type=int, default=768, help="embedding dimension (nomic-embed-text is 768)")
+    parser.add_argument("--words", type=int, default=150, help="mean words of content per entry")
+    parser.add_argument("--queries", type=int, default=20, help="queries per stage")
+    parser.add_argument("--repeat", type=int, default=5, help="timed calls per query and stage")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--ann", action="store_true", help="enable the IVF index (LORE_BOT_ANN_INDEX)")
+    parser.add_argument("--json", metavar="PATH", help="write machine-readable results to PATH")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against a stored baseline; exit 1 on regression")
+    parser.add_argument("--save-baseline", metavar="PATH", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown per stage (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05, help="ignore slowdowns smaller than this")
+    parser.add_argument("--memory-tolerance", type=float, default=0.10, help="allowed index memory growth")
+    return parser
+
+
+def server_environment(ann: bool, scratch: Path) -> dict[str, str]:
+    """LORE_BOT_* overrides for the benchmark: the ANN switch, and scratch paths so a
+    run never touches the real ANN index or embedding cache next to server.py."""
+    return {
+        "LORE_BOT_ANN_INDEX": "true" if ann else "false",
+        "LORE_BOT_ANN_INDEX_PATH": str(scratch / "ann_index.npz"),
+        "LORE_BOT_EMBED_CACHE_PATH": str(scratch / "embed_cache.npz"),
+    }
+
+
+def load_server(environment: dict[str, str]):
+    """Import server.py with the given environment overrides applied first."""
+    global server
+    os.environ.update(environment)
+    server = importlib.import_module("server")
+    # Retrieval logs every query; only warnings matter here.
+    server.log_writer.min_level = server.LOG_LEVELS["warn"]
+    return server
+
+
+# ---------------------------------------------------------------------------
+# Synthetic corpus
+# ---------------------------------------------------------------------------
+
+SYLLABLES = ("ar", "mo", "zel", "de", "mi", "ra", "lo", "ios", "the", "on", "ka", "vir", "ul", "en", "dra",
+             "fay", "sa", "gor", "ith", "el", "beth", "an", "ro", "mir", "ta", "un", "os", "ca", "lyn", "dor")
+CATEGORIES = ("Redeemers", "Known Figures", "Ages", "Letters", "Heresies", "Orders", "Relics", "Places",
+              "Creatures", "Rites", "Chronicles", "Houses")
+
+
+def make_vocabulary(rng: random.Random, size: int) -> list[str]:
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def make_rows(n: int, dim: int, words: int, seed: int) -> tuple[list[dict], np.ndarray]:
+    """lore_items-shaped rows plus their (unnormalised) embeddings."""
+    rng = random.Random(seed)
+    vocab = make_vocabulary(rng, 6000)
+    # Zipf-like word frequencies, as in real prose.
+    weights = [1 / (rank + 1) for rank in range(len(vocab))]
+    embeddings = np.random.default_rng(seed).standard_normal((n, dim), dtype=np.float32)
+    rows = []
+    for i in range(n):
+        title = " ".join(w.capitalize() for w in rng.sample(vocab[200:], rng.randint(1, 3)))
+        body = rng.choices(vocab, weights, k=max(10, int(rng.gauss(words, words / 3))))
+        rows.append({
+            "id": i,
+            "title": title,
+            "slug": f"{title.lower().replace(' ', '-')}-{i}",
+            "category": CATEGORIES[i % len(CATEGORIES)],
+            "author": rng.choice(("", "Thelonius", "Merlin")),
+            "date": None,
+            "content": f"# {title}\n\n" + " ".join(body).capitalize() + ".",
+            "embedding": embeddings[i],
+            "updated_at": "2026-01-01T00:00:00+00:00",
+        })
+    return rows, embeddings
+
+
+def make_queries(index: "server.LoreSearchIndex", count: int, seed: int) -> list[tuple[str, np.ndarray]]:
+    """(question, stubbed embedding) pairs: entity, category and open questions.
+
+    Each stubbed embedding sits near one entry's vector so vector search returns
+    results above MIN_VECTOR_SCORE, as real questions do.
+    """
+    rng = random.Random(seed)
+    noise = np.random.default_rng(seed)
+    entries = index.vector_entries
+    queries = []
+    for i in range(count):
+        row = rng.randrange(len(entries))
+        entry = entries[row]
+        kind = i % 4
+        if kind == 0:
+            question = f"Who is {entry.title}?"
+        elif kind == 1:
+            question = f"Tell me about {entry.title} and the {entry.category}."
+        elif kind == 2:
+            question = f"What are the {rng.choice(CATEGORIES)}?"
+        else:
+            question = f"What happened during the {entry.title.split()[0].lower()} rite?"
+        # vector_matrix keeps raw rows; scale to unit length so the noise is relative.
+        base = index.vector_matrix[row] * index.vector_inv_norms[row]
+        vector = base + noise.standard_normal(base.shape, dtype=np.float32) * (0.5 / np.sqrt(base.size))
+        queries.append((question, vector.astype(np.float32)))
+    return queries
+
+
+# ---------------------------------------------------------------------------
+# Timing
+# ---------------------------------------------------------------------------
+
+def summarise(samples_s: list[float], peak_bytes: int) -> dict:
+    samples_ms = sorted(s * 1000 for s in samples_s)
+    return {
+        "calls": len(samples_ms),
+        "mean_ms": round(statistics.fmean(samples_ms), 4),
+        "p50_ms": round(samples_ms[len(samples_ms) // 2], 4),
+        "p95_ms": round(samples_ms[min(len(samples_ms) - 1, int(len(samples_ms) * 0.95))], 4),
+        "peak_alloc_kb": round(peak_bytes / 1024, 1),
+    }
+
+
+def peak_allocation(call) -> int:
+    tracemalloc.start()
+    try:
+        call()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_stage(calls: list, repeat: int) -> dict:
+    """calls: one zero-argument callable per query."""
+    for call in calls:
+        call()  # warm caches (e.g. keyword term positions) as a running server would have
+    samples = []
+    for _ in range(repeat):
+        for call in calls:
+            t = time.perf_counter()
+            call()
+            samples.append(time.perf_counter() - t)
+    return summarise(samples, max(peak_allocation(call) for call in calls))
+
+
+def bench_build_rag_prompt(current: "server.LoreCorpus", queries: list[tuple[str, np.ndarray]], repeat: int) -> dict:
+    vectors = {question: vector for question, vector in queries}
+
+    async def stub_query_embedding(query: str) -> np.ndarray:
+        return vectors[query]
+
+    server.get_query_embedding = stub_query_embedding
+
+    async def run() -> dict:
+        async def once(question: str) -> float:
+            server.rag_bundle_cache.clear()  # every call does the full retrieval
+            t = time.perf_counter()
+            await server.build_rag_prompt(question, current)
+            return time.perf_counter() - t
+
+        for question, _ in queries:
+            await once(question)
+        samples = [await once(question) for _ in range(repeat) for question, _ in queries]
+        peak = 0
+        for question, _ in queries:
+            server.rag_bundle_cache.clear()
+            tracemalloc.start()
+            await server.build_rag_prompt(question, current)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+        return summarise(samples, peak)
+
+    return asyncio.run(run())
+
+
+def bench_size(n: int, args: argparse.Namespace) -> dict:
+    rows, embeddings = make_rows(n, args.dim, args.words, args.seed + n)
+    rss_before = server.process_memory()["rss_bytes"]
+    t = time.perf_counter()
+    index, corpus_prompt, _ = server.build_lore_index(rows, expected_rows=n)
+    build_s = time.perf_counter() - t
+    del rows, embeddings
+    current = server.LoreCorpus(index, corpus_prompt, version=n, source="bench")
+    queries = make_queries(index, args.queries, args.seed)
+    top_k = server.RAG_TOP_K
+
+    vector_results = {q: index.search_vector(v, q, top_k=top_k) for q, v in queries}
+    stages = {
+        "search_vector": bench_stage(
+            [lambda q=q, v=v: index.search_vector(v, q, top_k=top_k) for q, v in queries], args.repeat),
+        "search_tfidf": bench_stage(
+            [lambda q=q: index.search_tfidf(q, top_k=top_k) for q, _ in queries], args.repeat),
+        "keyword_inject": bench_stage(
+            [lambda q=q: server.keyword_inject(vector_results[q], q, top_k, index=index) for q, _ in queries],
+            args.repeat),
+        "prioritize_exact_keyword_matches": bench_stage(
+            [lambda q=q: server.prioritize_exact_keyword_matches(vector_results[q], q, top_k, index=index)
+             for q, _ in queries],
+            args.repeat),
+        "get_category_flood_entries": bench_stage(
+            [lambda q=q: server.get_category_flood_entries(q, index) for q, _ in queries], args.repeat),
+        "build_rag_prompt": bench_build_rag_prompt(current, queries, args.repeat),
+    }
+    memory = index.memory_report()
+    rss_after = server.process_memory()["rss_bytes"]
+    return {
+        "entries": len(index.entries),
+        "build_s": round(build_s, 3),
+        "ann_active": bool(index.ann_stats.get("active")),
+        "index_memory_bytes": memory["total"],
+        "index_memory": memory,
+        "rss_bytes": rss_after,
+        "rss_growth_bytes": rss_after - rss_before if rss_before is not None and rss_after is not None else None,
+        "stages": stages,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Baseline comparison
+# ---------------------------------------------------------------------------
+
+def find_regressions(results: dict, baseline: dict, args: argparse.Namespace) -> list[str]:
+    regressions = []
+    for size, current in results["sizes"].items():
+        before = baseline.get("sizes", {}).get(size)
+        if before is None:
+            continue
+        for stage, stats in current["stages"].items():
+            old = before["stages"].get(stage)
+            if old is None:
+                continue
+            limit = old["p50_ms"] * (1 + args.tolerance)
+            if stats["p50_ms"] > limit and stats["p50_ms"] - old["p50_ms"] >= args.min_delta_ms:
+                regressions.append(f"{size} entries / {stage}: p50 {stats['p50_ms']:.3f}ms "
+                                   f"vs baseline {old['p50_ms']:.3f}ms")
+        old_memory = before.get("index_memory_bytes")
+        if old_memory and current["index_memory_bytes"] > old_memory * (1 + args.memory_tolerance):
+            regressions.append(f"{size} entries / index memory: {current['index_memory_bytes']:,} bytes "
+                               f"vs baseline {old_memory:,}")
+    return regressions
+
+
+def print_table(size: str, result: dict) -> None:
+    print(f"\n{size} entries — built in {result['build_s']}s, index {result['index_memory_bytes'] / 2**20:.1f} MB"
+          f"{', IVF index active' if result['ann_active'] else ''}")
+    print(f"  {'stage':34} {'mean_ms':>10} {'p50_ms':>10} {'p95_ms':>10} {'peak_kb':>10}")
+    for stage, stats in result["stages"].items():
+        print(f"  {stage:34} {stats['mean_ms']:>10.3f} {stats['p50_ms']:>10.3f} {stats['p95_ms']:>10.3f} "
+              f"{stats['peak_alloc_kb']:>10.1f}")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.baseline and not Path(args.baseline).is_file():
+        print(f"[ERROR] No baseline at {args.baseline}. Baselines are per machine: create one on this host with\n"
+              f"        python bench_retrieval.py --sizes {args.sizes} --save-baseline {args.baseline}\n"
+              f"        before changing retrieval code, then compare with --baseline.")
+        return 2
+    load_server(server_environment(args.ann, Path(tempfile.mkdtemp(prefix="lore-bench-"))))
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    print(f"[INFO] Corpus sizes {sizes}, {args.dim}d embeddings, {args.queries} queries x {args.repeat} calls per stage, "
+          f"ANN {'on' if args.ann else 'off'}")
+    results = {
+        "meta": {
+            "dim": args.dim,
+            "words": args.words,
+            "queries": args.queries,
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "ann": args.ann,
+            "rag_top_k": server.RAG_TOP_K,
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+        },
+        "sizes": {},
+    }
+    for n in sizes:
+        result = bench_size(n, args)
+        results["sizes"][str(n)] = result
+        print_table(str(n), result)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"\n[INFO] Wrote {args.json}")
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"[INFO] Saved baseline to {args.save_baseline}")
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = find_regressions(results, baseline, args)
+        if regressions:
+            print(f"\n[ERROR] {len(regressions)} regression(s) against {args.baseline}:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print(f"\n[INFO] No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,6 +15,8 @@ Requirements:
 
 import sys
 import json
+from datetime import datetime, timezone
+
 import httpx
 
 # ---------------------------------------------------------------------------
@@ -61,12 +63,15 @@ def fetch_rows(only_null: bool) -> list[dict]:
 
 
 def write_embedding(row_id: str, vector: list[float]) -> None:
-    """PATCH a single row's embedding column."""
+    """PATCH a single row's embedding column.
+
+    Also bumps updated_at so the bot's delta reload picks up the new embedding.
+    """
     resp = httpx.patch(
         f"{SUPABASE_URL}/rest/v1/lore_items",
         headers={**HEADERS, "Prefer": "return=minimal"},
         params={"id": f"eq.{row_id}"},
-        content=json.dumps({"embedding": vector}),
+        content=json.dumps({"embedding": vector, "updated_at": datetime.now(timezone.utc).isoformat()}),
         timeout=30,
     )
     resp.raise_for_status()
@@ -0,0 +1,274 @@
+"""
+fake_ollama.py
+==============
+A stand-in for Ollama, for load-testing server.py without the GPU box.
+
+Implements the endpoints the bot uses — /api/tags, /api/embed and /api/chat
+(streaming and not) — with timing modelled on a real Ollama instance:
+
+  - Only --parallel generations run at once (OLLAMA_NUM_PARALLEL); the rest wait.
+  - Prompt prefill costs prompt tokens / --prefill-tps seconds, less whatever
+    prefix matches a recently evaluated prompt (Ollama's KV cache reuse).
+  - Answers stream at --tps tokens per second, capped by num_predict.
+  - A model that is not loaded, whose keep_alive has expired, or that is asked
+    for a different num_ctx is (re)loaded first, costing --load-ms.
+
+Embeddings are deterministic per input text, so repeated questions embed the same.
+
+Usage:
+    python fake_ollama.py                                  # http://127.0.0.1:11435
+    python fake_ollama.py --port 11436 --tps 25 --parallel 2 --load-ms 8000
+
+Then start the bot against it, for example:
+    OLLAMA_URL=http://127.0.0.1:11435 LORE_BOT_MIN_VECTOR_SCORE=-1 python server.py
+
+(Fake embeddings do not resemble the stored ones, so LORE_BOT_MIN_VECTOR_SCORE=-1
+keeps retrieval returning a full set of entries and prompts realistically sized.)
+
+Requirements: fastapi and uvicorn (already in requirements.txt).
+"""
+
+import re
+import json
+import time
+import math
+import random
+import asyncio
+import hashlib
+import argparse
+from collections import deque
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# ---------------------------------------------------------------------------
+# Config (parsed in main() and handed to create_app())
+# ---------------------------------------------------------------------------
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Fake Ollama server for lore-bot load tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--models", default="qwen2.5:14b,nomic-embed-text:latest",
+                        help="comma-separated model names reported by /api/tags")
+    parser.add_argument("--parallel", type=int, default=1, help="generations served at once (OLLAMA_NUM_PARALLEL)")
+    parser.add_argument("--prefill-tps", type=float, default=1500, help="prompt tokens evaluated per second")
+    parser.add_argument("--tps", type=float, default=40, help="generated tokens per second per request")
+    parser.add_argument("--answer-tokens", type=int, default=250, help="typical answer length in tokens")
+    parser.add_argument("--load-ms", type=float, default=4000, help="time to load a model that is not resident")
+    parser.add_argument("--embed-ms", type=float, default=20, help="time per /api/embed call")
+    parser.add_argument("--embed-dim", type=int, default=768)
+    parser.add_argument("--jitter", type=float, default=0.15, help="random +/- share applied to every delay")
+    parser.add_argument("--cache-prompts", type=int, default=4, help="recent prompts kept for prefix reuse")
+    return parser
+
+
+ANSWER_WORDS = ("It", "is", "written", "in", "the", "chronicles", "that", "the", "Redeemers", "walked", "among",
+                "the", "faithful", "before", "the", "Tenth", "Creation", "and", "that", "their", "names", "were",
+                "kept", "by", "the", "scribes", "of", "the", "Archives")
+
+
+def jittered(seconds: float, jitter: float) -> float:
+    return max(0.0, seconds * (1 + random.uniform(-jitter, jitter)))
+
+
+def parse_keep_alive(value) -> float:
+    """Seconds a model stays loaded after a request (inf for negative, as Ollama does)."""
+    if value is None:
+        return 300.0
+    if isinstance(value, (int, float)):
+        return math.inf if value < 0 else float(value)
+    match = re.fullmatch(r"\s*(-?\d+(?:\.\d+)?)\s*(ms|s|m|h)?\s*", str(value))
+    if not match:
+        return 300.0
+    amount = float(match.group(1))
+    if amount < 0:
+        return math.inf
+    return amount * {"ms": 0.001, "s": 1, "m": 60, "h": 3600, None: 1}[match.group(2)]
+
+
+# ---------------------------------------------------------------------------
+# Model state
+# ---------------------------------------------------------------------------
+
+class FakeModel:
+    """Residency, context size and recent prompts of one model."""
+
+    def __init__(self, name: str, config: argparse.Namespace):
+        self.name = name
+        self.config = config
+        self.loaded_until = 0.0
+        self.num_ctx: Optional[int] = None
+        self.lock = asyncio.Lock()
+        self.recent_prompts: deque[str] = deque(maxlen=config.cache_prompts)
+        self.loads = 0
+
+    async def ensure_loaded(self, num_ctx: Optional[int], keep_alive) -> float:
+        """Load (or reload for a new num_ctx) if needed; returns the load time in seconds."""
+        async with self.lock:
+            now = time.monotonic()
+            load_s = 0.0
+            if now >= self.loaded_until or (num_ctx is not None and num_ctx != self.num_ctx):
+                load_s = jittered(self.config.load_ms / 1000, self.config.jitter)
+                await asyncio.sleep(load_s)
+                self.loads += 1
+                self.num_ctx = num_ctx
+                self.recent_prompts.clear()
+            self.loaded_until = time.monotonic() + parse_keep_alive(keep_alive)
+            return load_s
+
+    def reused_tokens(self, prompt: str) -> int:
+        best = 0
+        for previous in self.recent_prompts:
+            # Binary search on slice equality: the comparisons run in C.
+            low, high = 0, min(len(previous), len(prompt))
+            while low < high:
+                mid = (low + high + 1) // 2
+                if previous[:mid] == prompt[:mid]:
+                    low = mid
+                else:
+                    high = mid - 1
+            best = max(best, low)
+        self.recent_prompts.append(prompt)
+        return best // 4
+
+
+def fake_embedding(text: str, dim: int) -> list[float]:
+    rng = random.Random(hashlib.blake2b(text.encode(), digest_size=8).digest())
+    vector = [rng.gauss(0, 1) for _ in range(dim)]
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def answer_tokens(count: int) -> list[str]:
+    words = [ANSWER_WORDS[i % len(ANSWER_WORDS)] + " " for i in range(max(count - 2, 1))]
+    return words + ["\n\n[[Sources]]", "[[/Sources]]"]
+
+
+# ---------------------------------------------------------------------------
+# Endpoints
+# ---------------------------------------------------------------------------
+
+def create_app(config: argparse.Namespace) -> FastAPI:
+    """A fake Ollama configured by parsed options (see build_parser()), with its own
+    models, counters and generation slots."""
+    app = FastAPI(title="fake-ollama")
+    models: dict[str, FakeModel] = {}
+    generation_slots: Optional[asyncio.Semaphore] = None
+    stats = {"chat": 0, "embed": 0, "waiting": 0, "active": 0}
+
+    def get_model(name: str) -> FakeModel:
+        if name not in models:
+            models[name] = FakeModel(name, config)
+        return models[name]
+
+    @app.on_event("startup")
+    async def startup_event():
+        nonlocal generation_slots
+        generation_slots = asyncio.Semaphore(max(config.parallel, 1))
+
+    @app.get("/api/tags")
+    async def tags():
+        names = [name.strip() for name in config.models.split(",") if name.strip()]
+        return {"models": [{"name": name, "model": name} for name in names]}
+
+    @app.post("/api/embed")
+    async def embed(request: Request):
+        body = await request.json()
+        inputs = body.get("input") or ""
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        stats["embed"] += 1
+        await get_model(body.get("model", "")).ensure_loaded(None, body.get("keep_alive"))
+        await asyncio.sleep(jittered(config.embed_ms / 1000, config.jitter))
+        return {"model": body.get("model"), "embeddings": [fake_embedding(text, config.embed_dim) for text in inputs]}
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        body = await request.json()
+        options = body.get("options") or {}
+        model = get_model(body.get("model", ""))
+        prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages") or [])
+        prompt_tokens = max(len(prompt) // 4, 1)
+        num_predict = options.get("num_predict") or config.answer_tokens
+        count = max(1, min(num_predict, int(jittered(config.answer_tokens, config.jitter))))
+        stats["chat"] += 1
+
+        async def generate():
+            """Yields (content, final_stats) pairs, holding a generation slot throughout."""
+            started = time.perf_counter()
+            stats["waiting"] += 1
+            try:
+                await generation_slots.acquire()
+            finally:
+                stats["waiting"] -= 1
+            stats["active"] += 1
+            try:
+                load_s = await model.ensure_loaded(options.get("num_ctx"), body.get("keep_alive"))
+                evaluated = max(prompt_tokens - model.reused_tokens(prompt), 1)
+                prefill_s = jittered(evaluated / config.prefill_tps, config.jitter)
+                await asyncio.sleep(prefill_s)
+                t_gen = time.perf_counter()
+                tokens = answer_tokens(count)
+                for i, token in enumerate(tokens):
+                    # Sleep towards each token's due time so pacing does not drift.
+                    due = t_gen + (i + 1) / config.tps
+                    await asyncio.sleep(max(0.0, due - time.perf_counter()))
+                    yield token, None
+                eval_s = time.perf_counter() - t_gen
+                yield "", {
+                    "total_duration": int((time.perf_counter() - started) * 1e9),
+                    "load_duration": int(load_s * 1e9),
+                    "prompt_eval_count": evaluated,
+                    "prompt_eval_duration": int(prefill_s * 1e9),
+                    "eval_count": len(tokens),
+                    "eval_duration": int(eval_s * 1e9),
+                }
+            finally:
+                stats["active"] -= 1
+                generation_slots.release()
+
+        def chunk(content: str, final: Optional[dict]) -> dict:
+            data = {
+                "model": model.name,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "message": {"role": "assistant", "content": content},
+                "done": final is not None,
+            }
+            if final is not None:
+                data["done_reason"] = "stop"
+                data.update(final)
+            return data
+
+        if not body.get("stream", True):
+            parts = []
+            final = None
+            async for content, final in generate():
+                parts.append(content)
+            return JSONResponse(chunk("".join(parts), final))
+
+        async def stream():
+            async for content, final in generate():
+                yield json.dumps(chunk(content, final)) + "\n"
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    @app.get("/fake/stats")
+    async def fake_stats():
+        """Counters for the load driver: requests served, generations active/waiting, model loads."""
+        return {**stats, "models": {name: {"loads": m.loads, "num_ctx": m.num_ctx} for name, m in models.items()}}
+
+    return app
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    print(f"[INFO] Fake Ollama on http://{args.host}:{args.port} — {args.parallel} parallel, "
+          f"prefill {args.prefill_tps:g} tok/s, generation {args.tps:g} tok/s, load {args.load_ms:g}ms")
+    uvicorn.run(create_app(args), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+"""
+load_test.py
+============
+Replays chat conversations against a running lore-bot and reports how it holds up.
+
+Each virtual user plays whole conversations: a first question (a starter
+button or a typed question), then follow-ups that resend the history the way
+loreChat.js does, with a pause between turns. Every request is streamed, and
+the driver records:
+
+  - time to first token and total latency (p50 / p90 / p99)
+  - outcomes: ok, answer-cache replay, 429 rate limited, 503 shed, queue
+    timeout, error frames, HTTP and connection errors
+  - how often requests waited in the generation queue
+  - server CPU and RSS: sampled from /proc with --server-pid, otherwise RSS
+    from /health
+
+Each virtual user sends its own CF-Connecting-IP, so per-client rate limits
+apply as they would to real visitors (use --shared-ip to put everyone on one).
+
+Usage:
+    python fake_ollama.py &                       # see fake_ollama.py
+    OLLAMA_URL=http://127.0.0.1:11435 LORE_BOT_MIN_VECTOR_SCORE=-1 python server.py &
+    python load_test.py --users 8 --duration 120 --server-pid <server pid>
+    python load_test.py --users 20 --requests 200 --think-s 0 --json results.json
+    python load_test.py --conversations my_conversations.json
+
+A conversations file is a JSON list of conversations, each a list of user turns.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import statistics
+from collections import Counter
+from typing import Optional
+
+import httpx
+
+# ---------------------------------------------------------------------------
+# Conversations
+# ---------------------------------------------------------------------------
+
+STARTER_QUESTIONS = [
+    "What happened before the Tenth Creation?",
+    "Tell me about the Redeemers and their roles.",
+    "Who are the Fay and where did they come from?",
+    "What is the Cult of Zeb?",
+    "Tell me about Thelonius the Scribe.",
+    "What was the Great Cataclysm?",
+]
+
+CONVERSATIONS = [
+    ["Tell me about the Redeemers and their roles.", "Which of them is the oldest?", "What happened to Demira?"],
+    ["What is the Cult of Zeb?", "Who founded it?"],
+    ["Who are the Fay and where did they come from?", "Are they connected to the Elysium Age?",
+     "What did the letters say about them?"],
+    ["What happened before the Tenth Creation?", "How did the Ninth Creation end?"],
+    ["Who is Merlin?", "What is his connection to Lyonesse?"],
+    ["What was the Great Cataclysm?", "Which kingdoms survived it?", "Who wrote about it?"],
+    ["Tell me about Thelonius the Scribe."],
+    ["What are the Princes of Hell?", "Which one is the most powerful?"],
+    ["Tell me about the Inquisition and the Ambergrasp.", "Why did the Inquisition fear it?"],
+    ["What is the Haunted Lands?", "Who lives there now?"],
+]
+
+
+def load_conversations(path: Optional[str]) -> list[list[str]]:
+    if not path:
+        return CONVERSATIONS
+    with open(path, encoding="utf-8") as f:
+        conversations = json.load(f)
+    if not conversations or not all(isinstance(turns, list) and turns for turns in conversations):
+        raise SystemExit(f"[ERROR] {path} must be a JSON list of non-empty lists of questions")
+    return conversations
+
+
+# ---------------------------------------------------------------------------
+# Results
+# ---------------------------------------------------------------------------
+
+class RequestResult:
+    __slots__ = ("outcome", "status", "ttft_s", "total_s", "queued", "queue_position", "turn", "chars")
+
+    def __init__(self, turn: int):
+        self.outcome = "ok"
+        self.status: Optional[int] = None
+        self.ttft_s: Optional[float] = None
+        self.total_s: Optional[float] = None
+        self.queued = False
+        self.queue_position = 0
+        self.turn = turn
+        self.chars = 0
+
+
+def percentile(values: list[float], share: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(share * (len(ordered) - 1))))]
+
+
+def latency_summary(values_s: list[float]) -> dict:
+    ms = [v * 1000 for v in values_s]
+    return {
+        "count": len(ms),
+        "mean_ms": round(statistics.fmean(ms)) if ms else None,
+        "p50_ms": round(percentile(ms, 0.50)) if ms else None,
+        "p90_ms": round(percentile(ms, 0.90)) if ms else None,
+        "p99_ms": round(percentile(ms, 0.99)) if ms else None,
+        "max_ms": round(max(ms)) if ms else None,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Server resource sampling
+# ---------------------------------------------------------------------------
+
+class ResourceSampler:
+    """CPU % and RSS of the server: /proc/<pid> when a pid is given, else RSS from /health."""
+
+    def __init__(self, client: httpx.AsyncClient, pid: Optional[int], interval_s: float):
+        self.client = client
+        self.pid = pid
+        self.interval_s = interval_s
+        self.cpu_percent: list[float] = []
+        self.rss_bytes: list[int] = []
+        self.errors = 0
+
+    def read_proc(self) -> tuple[float, int]:
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        cpu_s = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        with open(f"/proc/{self.pid}/status") as f:
+            rss = next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmRSS:"))
+        return cpu_s, rss
+
+    async def run(self) -> None:
+        previous = None
+        while True:
+            try:
+                if self.pid:
+                    cpu_s, rss = self.read_proc()
+                    now = time.perf_counter()
+                    if previous is not None:
+                        self.cpu_percent.append(100 * (cpu_s - previous[0]) / (now - previous[1]))
+                    previous = (cpu_s, now)
+                    self.rss_bytes.append(rss)
+                else:
+                    resp = await self.client.get("/health", timeout=10)
+                    rss = resp.json().get("memory", {}).get("process", {}).get("rss_bytes")
+                    if rss:
+                        self.rss_bytes.append(rss)
+            except (OSError, ValueError, StopIteration, httpx.HTTPError):
+                self.errors += 1
+            await asyncio.sleep(self.interval_s)
+
+    def summary(self) -> dict:
+        return {
+            "source": f"/proc/{self.pid}" if self.pid else "/health",
+            "samples": len(self.rss_bytes),
+            "cpu_mean_percent": round(statistics.fmean(self.cpu_percent), 1) if self.cpu_percent else None,
+            "cpu_max_percent": round(max(self.cpu_percent), 1) if self.cpu_percent else None,
+            "rss_start_mb": round(self.rss_bytes[0] / 2**20, 1) if self.rss_bytes else None,
+            "rss_max_mb": round(max(self.rss_bytes) / 2**20, 1) if self.rss_bytes else None,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Driver
+# ---------------------------------------------------------------------------
+
+class LoadTest:
+    def __init__(self, options, conversations: list[list[str]]):
+        self.options = options
+        self.conversations = conversations
+        self.results: list[RequestResult] = []
+        self.started = 0
+        self.deadline = 0.0
+
+    def budget_left(self) -> bool:
+        if self.options.requests and self.started >= self.options.requests:
+            return False
+        return time.perf_counter() < self.deadline
+
+    async def send(self, client: httpx.AsyncClient, user: int, messages: list[dict], turn: int,
+                   source: str) -> tuple[RequestResult, str]:
+        result = RequestResult(turn)
+        parts: list[str] = []
+        if self.options.shared_ip:
+            ip = "198.51.100.1"
+        else:
+            host = 1 + self.started % 250 if self.options.vary_ip_per_turn else 1
+            ip = f"10.{user // 250}.{user % 250}.{host}"
+        payload = {
+            "messages": messages,
+            "stream": True,
+            "request_id": f"load-{user}-{self.started}",
+            "request_source": source,
+            "use_answer_cache": not self.options.no_answer_cache,
+        }
+        t_start = time.perf_counter()
+        try:
+            async with client.stream("POST", "/api/chat", json=payload, headers={"CF-Connecting-IP": ip},
+                                     timeout=self.options.timeout_s) as resp:
+                result.status = resp.status_code
+                if resp.status_code != 200:
+                    await resp.aread()
+                    result.outcome = {429: "rate_limited", 503: "shed"}.get(resp.status_code, f"http_{resp.status_code}")
+                    return result, ""
+                async for line in resp.aiter_lines():
+                    if not line.strip():
+                        continue
+                    frame = json.loads(line)
+                    meta = frame.get("meta")
+                    if meta is not None:
+                        if meta.get("phase") == "queued":
+                            result.queued = True
+                            result.queue_position = max(result.queue_position, meta.get("queue_position") or 0)
+                        if meta.get("answer_cache_hit"):
+                            result.outcome = "answer_cache"
+                        continue
+                    if "error" in frame:
+                        busy = "busy" in str(frame["error"]).lower()
+                        result.outcome = "queue_timeout" if busy else "error_frame"
+                        break
+                    content = frame.get("content") or ""
+                    if content:
+                        if result.ttft_s is None:
+                            result.ttft_s = time.perf_counter() - t_start
+                        parts.append(content)
+                    if frame.get("done"):
+                        break
+                else:
+                    if result.outcome == "ok":
+                        result.outcome = "incomplete"
+        except httpx.TimeoutException:
+            result.outcome = "timeout"
+        except httpx.HTTPError as e:
+            result.outcome = f"connection_error:{type(e).__name__}"
+        result.total_s = time.perf_counter() - t_start
+        answer = "".join(parts)
+        result.chars = len(answer)
+        return result, answer
+
+    async def user(self, client: httpx.AsyncClient, user: int) -> None:
+        rng = random.Random(self.options.seed + user)
+        # Stagger arrivals so the first wave does not land in the same millisecond.
+        await asyncio.sleep(rng.uniform(0, self.options.ramp_s))
+        while self.budget_left():
+            turns = rng.choice(self.conversations)
+            history: list[dict] = []
+            for turn, question in enumerate(turns):
+                if not self.budget_left():
+                    return
+                self.started += 1
+                history.append({"role": "user", "content": question})
+                source = "starter_pill" if turn == 0 and question in STARTER_QUESTIONS else "text_entry"
+                result, answer = await self.send(client, user, history, turn, source)
+                self.results.append(result)
+                if result.outcome not in ("ok", "answer_cache"):
+                    break  # a visitor who hit an error starts over
+                history.append({"role": "assistant", "content": answer})
+                if self.options.think_s:
+                    await asyncio.sleep(rng.uniform(0.5, 1.5) * self.options.think_s)
+
+    async def run(self) -> dict:
+        limits = httpx.Limits(max_connections=self.options.users + 4, max_keepalive_connections=self.options.users + 4)
+        async with httpx.AsyncClient(base_url=self.options.url, limits=limits) as client:
+            try:
+                await client.get("/health", timeout=10)
+            except httpx.HTTPError as e:
+                raise SystemExit(f"[ERROR] Cannot reach the bot at {self.options.url}: {e}")
+            sampler = ResourceSampler(client, self.options.server_pid, self.options.sample_s)
+            sampling = asyncio.create_task(sampler.run())
+            t_start = time.perf_counter()
+            self.deadline = t_start + self.options.duration
+            await asyncio.gather(*(self.user(client, user) for user in range(self.options.users)))
+            elapsed = time.perf_counter() - t_start
+            sampling.cancel()
+        return self.report(elapsed, sampler)
+
+    def report(self, elapsed: float, sampler: ResourceSampler) -> dict:
+        results = self.results
+        outcomes = Counter(r.outcome for r in results)
+        succeeded = [r for r in results if r.outcome in ("ok", "answer_cache")]
+        generated = [r for r in succeeded if r.outcome == "ok"]
+        failed = len(results) - len(succeeded)
+        return {
+            "config": {
+                "url": self.options.url,
+                "users": self.options.users,
+                "duration_s": self.options.duration,
+                "requests": self.options.requests,
+                "think_s": self.options.think_s,
+                "answer_cache": not self.options.no_answer_cache,
+                "shared_ip": self.options.shared_ip,
+            },
+            "elapsed_s": round(elapsed, 1),
+            "requests": len(results),
+            "throughput_rps": round(len(results) / elapsed, 2) if elapsed else None,
+            "outcomes": dict(outcomes.most_common()),
+            "error_rate": round(failed / len(results), 4) if results else None,
+            "queued_share": round(sum(r.queued for r in results) / len(results), 4) if results else None,
+            "max_queue_position": max((r.queue_position for r in results), default=0),
+            "ttft": latency_summary([r.ttft_s for r in generated if r.ttft_s is not None]),
+            "ttft_first_turn": latency_summary([r.ttft_s for r in generated if r.ttft_s is not None and r.turn == 0]),
+            "ttft_follow_up": latency_summary([r.ttft_s for r in generated if r.ttft_s is not None and r.turn > 0]),
+            "total": latency_summary([r.total_s for r in succeeded if r.total_s is not None]),
+            "server": sampler.summary(),
+        }
+
+
+def print_report(report: dict) -> None:
+    print()
+    print("=" * 60)
+    print(f"  {report['requests']} requests in {report['elapsed_s']}s ({report['throughput_rps']} req/s), "
+          f"error rate {report['error_rate']}")
+    print("=" * 60)
+    print("  outcomes: " + ", ".join(f"{name}={count}" for name, count in report["outcomes"].items()))
+    print(f"  queued: {report['queued_share']} of requests (max position {report['max_queue_position']})")
+    for label in ("ttft", "ttft_first_turn", "ttft_follow_up", "total"):
+        s = report[label]
+        print(f"  {label:16} n={s['count']:<5} p50={s['p50_ms']}ms p90={s['p90_ms']}ms "
+              f"p99={s['p99_ms']}ms max={s['max_ms']}ms")
+    server = report["server"]
+    print(f"  server ({server['source']}): cpu mean={server['cpu_mean_percent']}% max={server['cpu_max_percent']}% "
+          f"rss start={server['rss_start_mb']}MB max={server['rss_max_mb']}MB")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load-test the lore-bot /api/chat endpoint.")
+    parser.add_argument("--url", default="http://localhost:8642", help="lore-bot base URL")
+    parser.add_argument("--users", type=int, default=8, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=60, help="seconds to run (stops earlier with --requests)")
+    parser.add_argument("--requests", type=int, default=0, help="stop after this many requests (0 = no limit)")
+    parser.add_argument("--think-s", type=float, default=3, help="mean pause between a user's turns")
+    parser.add_argument("--ramp-s", type=float, default=2, help="spread the users' first requests over this long")
+    parser.add_argument("--timeout-s", type=float, default=180, help="per-request timeout")
+    parser.add_argument("--conversations", help="JSON file: list of conversations, each a list of user turns")
+    parser.add_argument("--no-answer-cache", action="store_true", help="send use_answer_cache=false")
+    parser.add_argument("--shared-ip", action="store_true", help="send every request from one client address")
+    parser.add_argument("--vary-ip-per-turn", action="store_true",
+                        help="give every turn its own client address (sidesteps per-client rate limits)")
+    parser.add_argument("--server-pid", type=int, help="sample this process's CPU and RSS from /proc")
+    parser.add_argument("--sample-s", type=float, default=1.0, help="resource sampling interval")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", metavar="PATH", help="also write the report to PATH")
+    options = parser.parse_args()
+
+    print(f"[INFO] {options.users} users against {options.url} for {options.duration:g}s"
+          f"{f' or {options.requests} requests' if options.requests else ''}")
+    report = asyncio.run(LoadTest(options, load_conversations(options.conversations)).run())
+    print_report(report)
+    if options.json:
+        with open(options.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"[INFO] Wrote {options.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,23 @@
+"""
+Shared setup for the lore-bot tests.
+
+server.py reads its configuration at import, so the environment is pointed at a
+scratch directory first: the tests never touch the real snapshot, ANN index or
+embedding cache next to server.py.
+
+Run from lore-bot/:
+    python -m pytest -q tests
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+_scratch = Path(tempfile.mkdtemp(prefix="lore-tests-"))
+os.environ.setdefault("LORE_BOT_ANN_INDEX", "false")
+os.environ["LORE_BOT_ANN_INDEX_PATH"] = str(_scratch / "ann_index.npz")
+os.environ["LORE_BOT_EMBED_CACHE_PATH"] = str(_scratch / "embed_cache.npz")
+os.environ["LORE_BOT_SNAPSHOT_DIR"] = str(_scratch)
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
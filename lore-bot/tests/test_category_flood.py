@@ -0,0 +1,85 @@
+"""Compiled category matcher against the original per-category substring loop."""
+
+import server
+
+CATEGORIES = ["Redeemers", "Known Figures", "Ages", "Orders", "Order of Light", "Rites", "Heresies",
+              "Ox", "Ash", "Glass", "Kin", "Lore"]
+
+QUERIES = [
+    # singular, plural, with and without the trailing s
+    "who are the redeemers?", "tell me about a redeemer", "list every redeemerss",
+    "which known figure is oldest", "known figures of the valley",
+    "what ages came before", "the age of iron",
+    "rite of passage", "all rites",
+    "heresies", "the heresie of merlin",
+    "glass", "glasses of the king",
+    # variants of 3 characters or fewer never match on their own
+    "an ox and an ash tree", "my kin", "ages", "age",
+    # typos collapsed by normalize_query
+    "redeeeemers", "riiites",
+    # several categories at once
+    "which redeemers founded the orders?", "orders and rites of the redeemers",
+    "the order of light and its rites", "ages of the known figures", "lore of the heresies",
+    "nothing relevant here", "",
+]
+
+
+def old_matches(categories: list[str], query_normalized: str) -> set[str]:
+    """Every category the original get_category_flood_entries loop could have returned;
+    it returned whichever of them set iteration reached first."""
+    matched = set()
+    for category in set(categories):
+        cat_lower = category.lower()
+        variants = {cat_lower, cat_lower.rstrip('s'), cat_lower + 's'}
+        if any(v in query_normalized for v in variants if len(v) > 3):
+            matched.add(category)
+    return matched
+
+
+def leftmost_longest(categories: list[str], query_normalized: str) -> str:
+    """The documented tie-break: earliest match in the query, then the longest variant."""
+    best = None
+    for category in categories:
+        cat_lower = category.lower()
+        for variant in (cat_lower, cat_lower.rstrip('s'), cat_lower + 's'):
+            start = query_normalized.find(variant)
+            if len(variant) > 3 and start >= 0:
+                key = (start, -len(variant))
+                if best is None or key < best[0]:
+                    best = (key, category)
+    return best[1]
+
+
+def build_index() -> server.LoreSearchIndex:
+    rows = [
+        {"id": f"{i}-{j}", "title": f"{category} {j}", "slug": f"{category.lower().replace(' ', '-')}-{j}",
+         "category": category, "content": f"Entry {j} of {category}."}
+        for i, category in enumerate(CATEGORIES) for j in range(3)
+    ]
+    index, _, _ = server.build_lore_index(rows)
+    return index
+
+
+def test_matches_original_loop():
+    index = build_index()
+    multiple = 0
+    for query in QUERIES:
+        query_normalized = server.normalize_query(query)
+        expected = old_matches(CATEGORIES, query_normalized)
+        found = index.match_category(query_normalized)
+        if not expected:
+            assert found is None, query
+        elif len(expected) == 1:
+            assert found == next(iter(expected)), query
+        else:
+            multiple += 1
+            assert found in expected, query
+            assert found == leftmost_longest(CATEGORIES, query_normalized), query
+    assert multiple >= 4
+
+
+def test_flood_returns_whole_category_in_corpus_order():
+    index = build_index()
+    flooded = server.get_category_flood_entries("Tell me about the Redeemers", index)
+    assert [entry.slug for entry in flooded] == ["redeemers-0", "redeemers-1", "redeemers-2"]
+    assert server.get_category_flood_entries("an ox", index) == []
@@ -0,0 +1,107 @@
+"""InFlightGeneration: late joins replay every frame, and the upstream is cancelled only when the last subscriber leaves."""
+
+import gc
+import asyncio
+
+import server
+
+
+class Upstream:
+    """An upstream generation that yields frames as the test feeds them."""
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.closed = False
+
+    async def frames(self):
+        try:
+            while (frame := await self.queue.get()) is not None:
+                yield frame
+        finally:
+            self.closed = True
+
+    def send(self, *frames) -> None:
+        for frame in frames:
+            self.queue.put_nowait(frame)
+
+
+def start_flight(key: str) -> tuple[Upstream, server.InFlightGeneration]:
+    upstream = Upstream()
+    flight = server.InFlightGeneration(key, "leader", upstream.frames())
+    server.inflight_generations[key] = flight
+    return upstream, flight
+
+
+async def settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def read_all(frames) -> list[str]:
+    return [frame async for frame in frames]
+
+
+def test_late_join_replays_from_the_first_frame():
+    async def scenario():
+        upstream, flight = start_flight("late")
+        leader = flight.join()
+        upstream.send("meta", "a")
+        assert [await leader.__anext__(), await leader.__anext__()] == ["meta", "a"]
+
+        follower = flight.join()
+        assert flight.subscribers == 2
+        upstream.send("b", "done", None)
+        assert await read_all(follower) == ["meta", "a", "b", "done"]
+        assert await read_all(leader) == ["b", "done"]
+        assert flight.done and flight.subscribers == 0
+        assert "late" not in server.inflight_generations
+    asyncio.run(scenario())
+
+
+def test_leader_disconnect_keeps_a_joined_follower_streaming():
+    async def scenario():
+        upstream, flight = start_flight("leader-gone")
+        leader = flight.join()
+        upstream.send("meta", "a")
+        assert await leader.__anext__() == "meta"
+        # The follower has joined but its response has not started iterating yet.
+        follower = flight.join()
+        await leader.aclose()
+        await settle()
+        assert flight.subscribers == 1 and not upstream.closed
+
+        upstream.send("b", "done", None)
+        assert await read_all(follower) == ["meta", "a", "b", "done"]
+    asyncio.run(scenario())
+
+
+def test_never_iterated_subscriber_leaves_when_collected():
+    async def scenario():
+        upstream, flight = start_flight("dropped")
+        leader = flight.join()
+        follower = flight.join()
+        del leader
+        gc.collect()
+        await settle()
+        assert flight.subscribers == 1 and not upstream.closed
+
+        del follower
+        gc.collect()
+        await settle()
+        assert flight.subscribers == 0 and upstream.closed
+        assert "dropped" not in server.inflight_generations
+    asyncio.run(scenario())
+
+
+def test_last_subscriber_leaving_cancels_and_unlists_the_flight():
+    async def scenario():
+        upstream, flight = start_flight("cancel")
+        only = flight.join()
+        upstream.send("meta")
+        assert await only.__anext__() == "meta"
+        await only.aclose()
+        # Unlisted at cancel time, before _pump unwinds: a new request cannot join it.
+        assert "cancel" not in server.inflight_generations
+        await settle()
+        assert upstream.closed and flight.done
+    asyncio.run(scenario())
@@ -0,0 +1,83 @@
+"""A delta reload must build the same corpus order, and so the same prompts, as a full reload."""
+
+import asyncio
+import hashlib
+
+import numpy as np
+
+import server
+
+CATEGORIES = ("Relics", "Redeemers", "Places")
+
+
+def embedding(row: dict) -> list[float]:
+    seed = int.from_bytes(hashlib.blake2b(f"{row['id']}|{row['content']}".encode(), digest_size=4).digest(), "little")
+    return [float(v) for v in np.random.default_rng(seed).standard_normal(16).astype(np.float32)]
+
+
+def make_row(i: int, category: str, sort_order: int, title: str) -> dict:
+    row = {"id": str(i), "title": title, "slug": f"entry-{i}", "category": category, "sort_order": sort_order,
+           "content": f"{title} is kept in the {category.lower()} of the archive, entry {i}.",
+           "updated_at": "v1"}
+    row["embedding"] = embedding(row)
+    return row
+
+
+def corpus_order(rows: list[dict]) -> list[dict]:
+    """LORE_ROW_ORDER + id, as a full load reads them."""
+    return sorted(rows, key=lambda row: (row["category"], row["sort_order"], row["title"], int(row["id"])))
+
+
+def changed(row: dict, **fields) -> dict:
+    row = {**row, **fields, "updated_at": "v2"}
+    row["embedding"] = embedding(row)
+    return row
+
+
+def slugs(entries) -> list[str]:
+    return [entry.slug for entry in entries]
+
+
+def test_delta_matches_full_reload():
+    rows = corpus_order([make_row(i, CATEGORIES[i % 3], i // 3, f"Title {chr(65 + i % 26)}{i}") for i in range(60)])
+    index, _, _ = server.build_lore_index(rows)
+
+    by_id = {row["id"]: row for row in rows}
+    updates = [
+        changed(by_id["3"], sort_order=100),                      # moves to the end of its category
+        changed(by_id["9"], title="Aaa First"),                   # same sort_order, new title
+        changed(by_id["12"], category="Places", sort_order=-1),   # moves to another category
+    ]
+    inserted = [make_row(100, "Relics", 4, "Inserted Relic"), make_row(101, "Redeemers", -5, "New Redeemer")]
+    deleted = ["21", "30"]
+    for row in inserted:
+        row["updated_at"] = "v2"
+
+    new_rows = {row["id"]: row for row in rows if row["id"] not in deleted}
+    new_rows.update({row["id"]: row for row in updates + inserted})
+    expected_rows = corpus_order(list(new_rows.values()))
+
+    upserts = [(row["id"], row["updated_at"], *server.entry_from_row(row)) for row in updates + inserted]
+    delta = index.with_changes(upserts, deleted, order=[row["id"] for row in expected_rows])
+    full, _, _ = server.build_lore_index(expected_rows)
+
+    assert slugs(delta.entries) == slugs(full.entries)
+    assert {c: slugs(e) for c, e in delta.category_entries.items()} == {c: slugs(e) for c, e in full.category_entries.items()}
+    for terms in (["archive"], ["relics"], ["kept", "places"]):
+        assert slugs(delta.keyword_matches(terms)) == slugs(full.keyword_matches(terms))
+
+    async def prompts(built: server.LoreSearchIndex, version: int) -> list[str]:
+        current = server.LoreCorpus(built, "", version=version, source="test")
+        return [(await server.build_rag_prompt(query, current))[0]
+                for query in ("Tell me about the relics", "Which redeemers are there?", "Title B1 archive")]
+
+    original = server.get_query_embedding
+
+    async def stub_query_embedding(query: str) -> np.ndarray:
+        return np.asarray(embedding({"id": "query", "content": query}), dtype=np.float32)
+
+    server.get_query_embedding = stub_query_embedding
+    try:
+        assert asyncio.run(prompts(delta, 1001)) == asyncio.run(prompts(full, 1002))
+    finally:
+        server.get_query_embedding = original
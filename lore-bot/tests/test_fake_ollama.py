@@ -0,0 +1,32 @@
+"""fake_ollama.create_app(): options come from the config it is given, and each app keeps its own state."""
+
+from fastapi.testclient import TestClient
+
+import fake_ollama
+
+
+def make_client(*argv: str) -> TestClient:
+    config = fake_ollama.build_parser().parse_args(["--load-ms", "0", "--embed-ms", "0", "--jitter", "0", *argv])
+    return TestClient(fake_ollama.create_app(config))
+
+
+def test_importing_parses_no_arguments():
+    assert not hasattr(fake_ollama, "args")
+    assert not hasattr(fake_ollama, "app")
+
+
+def test_apps_use_their_own_config_and_state():
+    with make_client("--models", "a:1,b:2", "--embed-dim", "8") as first, \
+            make_client("--embed-dim", "4", "--answer-tokens", "5", "--tps", "5000") as second:
+        assert [m["name"] for m in first.get("/api/tags").json()["models"]] == ["a:1", "b:2"]
+        assert len(first.post("/api/embed", json={"model": "e", "input": "hi"}).json()["embeddings"][0]) == 8
+        assert len(second.post("/api/embed", json={"model": "e", "input": ["hi", "there"]}).json()["embeddings"][1]) == 4
+
+        reply = second.post("/api/chat", json={"model": "m", "stream": False,
+                                               "messages": [{"role": "user", "content": "Who are the Redeemers?"}]})
+        assert reply.json()["done"] and reply.json()["eval_count"] == 5
+
+        assert first.get("/fake/stats").json()["chat"] == 0
+        second_stats = second.get("/fake/stats").json()
+        assert second_stats["chat"] == 1 and second_stats["embed"] == 1
+        assert second_stats["models"]["m"]["loads"] == 1
@@ -0,0 +1,103 @@
+"""GenerationScheduler: queue positions, load shedding with Retry-After, and slots freed by departing clients."""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+
+
+async def next_position(waiter) -> int:
+    return await asyncio.wait_for(waiter.__anext__(), 1)
+
+
+def test_queue_positions_update_as_the_line_moves():
+    async def scenario():
+        scheduler = server.GenerationScheduler(limit=1, max_queue=4)
+        first = scheduler.admit("text_entry")
+        second = scheduler.admit("starter_pill")
+        third = scheduler.admit("starter_pill")
+        assert first.granted and scheduler.position(first) == 0
+
+        waiter = scheduler.wait(third)
+        assert await next_position(waiter) == 2
+        # A higher-priority arrival is queued ahead of both pills.
+        typed = scheduler.admit("text_entry")
+        assert scheduler.position(typed) == 1
+        assert await next_position(waiter) == 3
+
+        scheduler.close(typed)
+        assert await next_position(waiter) == 2
+        scheduler.close(first)  # second takes the slot
+        assert second.granted
+        assert await next_position(waiter) == 1
+        scheduler.close(second)
+        with pytest.raises(StopAsyncIteration):
+            await next_position(waiter)
+        assert third.granted and scheduler.active == 1 and not scheduler.queue
+    asyncio.run(scenario())
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    scheduler = server.GenerationScheduler(limit=1, max_queue=2)
+    scheduler.hold_s = 10.0
+    tickets = [scheduler.admit("text_entry") for _ in range(3)]
+    assert scheduler.full
+    with pytest.raises(server.QueueFull) as rejected:
+        scheduler.admit("text_entry")
+    # Two queued ahead plus this request, one slot: three generations of ~10s.
+    assert rejected.value.retry_after_s == 30
+    assert scheduler.stats()["shed"] == 1 and scheduler.stats()["admitted"] == 3
+
+    scheduler.close(tickets[2])
+    assert not scheduler.full and scheduler.admit("text_entry") is not None
+
+
+def test_chat_sheds_with_503_and_retry_after(monkeypatch):
+    rows = [{"id": "1", "title": "Relic 1", "slug": "relic-1", "category": "Relics", "content": "A relic."}]
+    index, prompt, _ = server.build_lore_index(rows)
+    monkeypatch.setattr(server, "corpus", server.LoreCorpus(index, prompt, version=7001, source="test"))
+    scheduler = server.GenerationScheduler(limit=1, max_queue=0)
+    scheduler.hold_s = 5.0
+    scheduler.admit("text_entry")
+    monkeypatch.setattr(server, "generation_scheduler", scheduler)
+
+    response = TestClient(server.app).post("/api/chat", json={"messages": [{"role": "user", "content": "Relics?"}]})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "5"
+    assert scheduler.shed == 1
+
+
+def test_queued_client_leaving_releases_its_place():
+    async def scenario():
+        scheduler = server.GenerationScheduler(limit=1, max_queue=2)
+        active = scheduler.admit("text_entry")
+        leaving = scheduler.admit("text_entry")
+        staying = scheduler.admit("text_entry")
+        assert scheduler.full
+
+        async def client(ticket):
+            # As stream_response does: wait for a slot, and close the ticket however it ends.
+            try:
+                async for _ in scheduler.wait(ticket):
+                    pass
+                await asyncio.Event().wait()
+            finally:
+                scheduler.close(ticket)
+
+        leaving_task = asyncio.create_task(client(leaving))
+        staying_task = asyncio.create_task(client(staying))
+        await asyncio.sleep(0)
+        leaving_task.cancel()  # the queued client disconnects
+        await asyncio.gather(leaving_task, return_exceptions=True)
+        assert scheduler.queue == [staying] and not scheduler.full
+
+        scheduler.close(active)
+        assert staying.granted and not leaving.granted and scheduler.active == 1
+        await asyncio.sleep(0.01)  # let it start generating
+        staying_task.cancel()  # the client holding the slot disconnects mid-generation
+        await asyncio.gather(staying_task, return_exceptions=True)
+        assert scheduler.active == 0 and not scheduler.queue
+    asyncio.run(scenario())
+
@@ -0,0 +1,88 @@
+"""search_tfidf against a full scan of every entry."""
+
+import math
+import random
+
+import server
+
+
+def make_rows(n: int, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    words = ("redeemer", "ash", "vale", "iron", "saint", "crown", "thorn", "keep", "mire", "heresy", "relic", "ox")
+    rows = []
+    for i in range(n):
+        title = " ".join(rng.sample(words, rng.randint(1, 3))).title()
+        if i % 7 == 0:
+            title += "s"
+        body = " ".join(rng.choice(words) for _ in range(rng.randint(5, 40)))
+        rows.append({"id": str(i), "title": title, "slug": f"entry-{i}", "category": "Lore", "content": body})
+    rows.append({"id": str(n), "title": "Redeemers", "slug": "redeemers", "category": "Lore", "content": "The chosen."})
+    return rows
+
+
+def reference_search(index: server.LoreSearchIndex, rows: list[dict], query: str, top_k: int) -> list[str]:
+    """Scores every entry: BM25 per query term, +3 per shared title word, +10 when the
+    whole query appears in the title."""
+    query_tokens = server.tokenize(query)
+    if not query_tokens:
+        return [row["slug"] for row in rows[:top_k]]
+    terms = [server.entry_from_row(row)[1] for row in rows]
+    n = len(rows)
+    avg_length = sum(t.length for t in terms) / n
+    doc_freq = {term: sum(1 for t in terms if term in t.counts) for term in set(query_tokens)}
+    query_lower = query.lower()
+    scores = []
+    for row, entry_terms in zip(rows, terms):
+        score = 0.0
+        for term in query_tokens:
+            tf = entry_terms.counts.get(term, 0)
+            if tf:
+                idf = math.log(1 + (n - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+                length_norm = server.BM25_K1 * (1 - server.BM25_B + server.BM25_B * (entry_terms.length / avg_length))
+                score += idf * tf * (server.BM25_K1 + 1) / (tf + length_norm)
+        title_words = set(row["title"].lower().split())
+        for word in set(query_lower.split()):
+            if word in title_words:
+                score += 3.0
+        if query_lower in row["title"].lower():
+            score += 10.0
+        scores.append((score, row["slug"]))
+    scores.sort(key=lambda x: x[0], reverse=True)
+    return [slug for score, slug in scores[:top_k] if score > 0]
+
+
+QUERIES = ["red", "Redeemers", "iron saint", "who is the iron saint?", "ox", "s", "keep mire", "Vale Crown", "heresy relics"]
+
+
+def test_search_matches_full_scan():
+    rows = make_rows(300, seed=4)
+    index, _, _ = server.build_lore_index(rows)
+    for query in QUERIES:
+        for top_k in (1, 5, 12):
+            found = [entry.slug for entry in index.search_tfidf(query, top_k)]
+            assert found == reference_search(index, rows, query, top_k), (query, top_k)
+
+
+def test_title_bonus_without_term_match():
+    # "red" is no term of either entry; only the whole-query title bonus can find one.
+    rows = [
+        {"id": "1", "title": "Iron Saint", "slug": "iron-saint", "category": "Lore", "content": "A saint of iron."},
+        {"id": "2", "title": "Redeemers", "slug": "redeemers", "category": "Lore", "content": "The chosen."},
+    ]
+    index, _, _ = server.build_lore_index(rows)
+    assert [entry.slug for entry in index.search_tfidf("red", 5)] == ["redeemers"]
+
+
+def test_search_after_delta_matches_full_scan():
+    rows = make_rows(200, seed=9)
+    index, _, _ = server.build_lore_index(rows)
+    changed = dict(rows[3], title="Redeemer Of Ash", content="ash ash vale")
+    added = {"id": "new", "title": "Ox Keep", "slug": "ox-keep", "category": "Lore", "content": "ox keep iron"}
+    upserts = [(row["id"], "v2", *server.entry_from_row(row)) for row in (changed, added)]
+    delta = index.with_changes(upserts, [rows[10]["id"]])
+
+    expected_rows = [changed if row["id"] == changed["id"] else row for row in rows if row["id"] != rows[10]["id"]]
+    expected_rows.append(added)
+    for query in QUERIES:
+        found = [entry.slug for entry in delta.search_tfidf(query, 12)]
+        assert found == reference_search(delta, expected_rows, query, 12), query
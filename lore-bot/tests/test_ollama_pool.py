@@ -0,0 +1,163 @@
+"""OllamaPool routing, ejection, fallback, re-admission and warmup against two fake_ollama.py servers."""
+
+import sys
+import time
+import socket
+import asyncio
+import subprocess
+from pathlib import Path
+
+import httpx
+import pytest
+
+import server
+
+FAKE_OLLAMA = Path(__file__).resolve().parent.parent / "fake_ollama.py"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class FakeOllama:
+    """A fake_ollama.py subprocess on a fixed port that can be stopped and started again."""
+
+    def __init__(self):
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.process = None
+
+    def start(self) -> None:
+        self.process = subprocess.Popen(
+            [sys.executable, str(FAKE_OLLAMA), "--port", str(self.port), "--load-ms", "0", "--embed-ms", "0",
+             "--tps", "5000", "--prefill-tps", "1000000", "--answer-tokens", "5", "--jitter", "0"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + 20
+        while time.monotonic() < deadline:
+            try:
+                if httpx.get(f"{self.url}/api/tags", timeout=1).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        self.stop()
+        raise RuntimeError(f"fake_ollama.py did not start on port {self.port}")
+
+    def stop(self) -> None:
+        if self.process is not None:
+            self.process.kill()
+            self.process.wait()
+            self.process = None
+
+    def stats(self) -> dict:
+        return httpx.get(f"{self.url}/fake/stats", timeout=5).json()
+
+
+@pytest.fixture
+def fakes():
+    servers = [FakeOllama(), FakeOllama()]
+    try:
+        for fake in servers:
+            fake.start()
+        yield servers
+    finally:
+        for fake in servers:
+            fake.stop()
+
+
+def run_with_client(coro_fn):
+    async def runner():
+        server.ollama_client = httpx.AsyncClient(timeout=httpx.Timeout(30, connect=2))
+        try:
+            return await coro_fn()
+        finally:
+            await server.ollama_client.aclose()
+            server.ollama_client = None
+    return asyncio.run(runner())
+
+
+def embed(pool: server.OllamaPool, text: str):
+    return pool.post("embed", "/api/embed", json={"model": server.EMBED_MODEL, "input": text}, timeout=10)
+
+
+def test_routes_across_backends(fakes):
+    a, b = server.OllamaBackend(fakes[0].url), server.OllamaBackend(fakes[1].url)
+    pool = server.OllamaPool([a, b])
+
+    async def scenario():
+        responses = await asyncio.gather(*(embed(pool, f"question {i}") for i in range(20)))
+        assert all(resp.status_code == 200 for resp in responses)
+
+    run_with_client(scenario)
+    assert a.requests > 0 and b.requests > 0
+    assert a.requests + b.requests == 20
+    assert [fake.stats()["embed"] for fake in fakes] == [a.requests, b.requests]
+    assert a.in_flight == b.in_flight == 0
+
+
+def test_ejects_dead_backend_and_falls_back(fakes):
+    a, b = server.OllamaBackend(fakes[0].url), server.OllamaBackend(fakes[1].url)
+    pool = server.OllamaPool([a, b])
+
+    async def scenario():
+        fakes[0].stop()
+        # Every call still succeeds: the dead backend fails to connect and the call moves on.
+        for i in range(6):
+            resp = await embed(pool, f"question {i}")
+            assert resp.status_code == 200
+        assert not a.healthy and a.consecutive_failures == server.OLLAMA_EJECT_AFTER
+        assert b.healthy
+
+        # Ejected: new calls go straight to the live backend.
+        served = b.requests
+        for i in range(4):
+            await embed(pool, f"again {i}")
+        assert b.requests == served + 4
+        assert a.failures == server.OLLAMA_EJECT_AFTER
+
+        # Streams fail over the same way.
+        async with pool.stream("chat", "POST", "/api/chat", json={
+            "model": server.OLLAMA_MODEL, "stream": True, "messages": [{"role": "user", "content": "hi"}],
+        }) as resp:
+            lines = [line async for line in resp.aiter_lines() if line]
+        assert lines and '"done": true' in lines[-1]
+
+        # A passing health check brings it back into rotation.
+        fakes[0].start()
+        await pool.check_all()
+        assert a.healthy and a.consecutive_failures == 0
+        before = a.requests
+        await asyncio.gather(*(embed(pool, f"back {i}") for i in range(10)))
+        assert a.requests > before
+
+    run_with_client(scenario)
+
+
+def test_all_backends_down_raises(fakes):
+    pool = server.OllamaPool([server.OllamaBackend(fakes[0].url), server.OllamaBackend(fakes[1].url)])
+
+    async def scenario():
+        for fake in fakes:
+            fake.stop()
+        with pytest.raises(httpx.ConnectError):
+            await embed(pool, "anyone there?")
+
+    run_with_client(scenario)
+
+
+def test_warmup_loads_every_backend(fakes):
+    backends = [server.OllamaBackend(fakes[0].url), server.OllamaBackend(fakes[1].url, roles=frozenset({"chat"}))]
+
+    async def scenario():
+        return await asyncio.gather(*(server.warm_backend(backend) for backend in backends))
+
+    assert run_with_client(scenario) == ["ok", "ok"]
+    first, second = fakes[0].stats(), fakes[1].stats()
+    assert first["chat"] == 1 and first["embed"] == 1
+    assert second["chat"] == 1 and second["embed"] == 0
+
+    fakes[1].stop()
+    results = run_with_client(scenario)
+    assert results[0] == "ok" and results[1].startswith("failed")
@@ -0,0 +1,74 @@
+"""pack_prompt_entries and truncate_prompt_block, and a category flood under the default token budget."""
+
+import asyncio
+
+import server
+
+
+def make_entry(i: int, words: int, summary: str = "", category: str = "Relics") -> server.LoreEntry:
+    # Content over 1500 chars is prompted as its summary, leaving no shorter brief block.
+    content = " ".join(f"word{i}_{n}" for n in range(words))
+    return server.LoreEntry(f"Relic {i}", f"relic-{i}", category, "", "", content, content, summary)
+
+
+def test_truncate_prompt_block_cuts_at_a_boundary_within_the_limit():
+    entry = make_entry(0, 400)
+    block, tokens = server.truncate_prompt_block(entry.prompt_block, entry.prompt_tokens, 120)
+    assert tokens <= 120 and tokens == server.estimate_token_count(block)
+    assert block.endswith(" […]")
+    assert entry.prompt_block.startswith(block[:-len(" […]")])
+    assert block[:-len(" […]")].split()[-1] in entry.prompt_block.split()
+
+
+def test_pack_prompt_entries_fills_in_rank_order():
+    whole = make_entry(1, 100)
+    briefed = make_entry(2, 130, summary="A short summary of relic two.")
+    long_tail = make_entry(3, 600)
+    tiny_gap = make_entry(4, 600)
+    assert briefed.brief_block is not None
+
+    budget = whole.prompt_tokens + briefed.brief_tokens + server.RAG_MIN_ENTRY_TOKENS + 2 * server.SEPARATOR_TOKENS
+    packed, blocks, tokens, counts = server.pack_prompt_entries([whole, briefed, long_tail, tiny_gap], budget)
+    assert [entry.slug for entry in packed] == ["relic-1", "relic-2", "relic-3"]
+    assert blocks[:2] == [whole.prompt_block, briefed.brief_block]
+    assert blocks[2].endswith(" […]")
+    assert counts == {"full": 1, "summary": 1, "truncated": 1, "dropped": 1}
+    assert tokens <= budget
+    assert tokens == sum(server.estimate_token_count(block) for block in blocks) + 2 * server.SEPARATOR_TOKENS
+
+
+def test_unlimited_budget_packs_every_entry_whole():
+    entries = [make_entry(i, 500) for i in range(5)]
+    packed, blocks, _, counts = server.pack_prompt_entries(entries, budget=0)
+    assert packed == entries and blocks == [entry.prompt_block for entry in entries]
+    assert counts == {"full": 5, "summary": 0, "truncated": 0, "dropped": 0}
+
+
+def test_required_entries_are_never_dropped():
+    required = [make_entry(1, 130, summary="Relic one, briefly."), make_entry(2, 400)]
+    supporting = make_entry(3, 50)
+    packed, blocks, _, counts = server.pack_prompt_entries(required + [supporting], budget=100, required=2)
+    assert packed == required
+    assert blocks == [required[0].brief_block, required[1].prompt_block]
+    assert counts == {"full": 1, "summary": 1, "truncated": 0, "dropped": 1}
+
+
+def test_category_flood_cites_every_entry_under_the_default_budget():
+    assert server.RAG_TOKEN_BUDGET == 8000
+    # 40 relics of ~350 tokens each, well over the budget, half with summaries; plus unrelated places.
+    rows = [{"id": str(i), "title": f"Relic {i}", "slug": f"relic-{i}", "category": "Relics",
+             "content": " ".join(f"word{i}_{n}" for n in range(130)),
+             "summary": f"Relic {i} in brief." if i % 2 else ""} for i in range(40)]
+    rows += [{"id": str(100 + i), "title": f"Place {i}", "slug": f"place-{i}", "category": "Places",
+              "content": f"Place {i} lies beyond the relic vaults."} for i in range(10)]
+    index, _, _ = server.build_lore_index(rows)
+    relics = index.category_entries["Relics"]
+    assert len(relics) == 40 and sum(entry.prompt_tokens for entry in relics) > server.RAG_TOKEN_BUDGET
+    current = server.LoreCorpus(index, "", version=5001, source="test")
+
+    prompt, timing = asyncio.run(server.build_rag_prompt("Tell me about all the relics", current))
+    assert timing["search_mode"] == "flood"
+    assert {entry.slug for entry in relics} <= {citation["slug"] for citation in timing["citations"]}
+    assert all(entry.citation_key in prompt for entry in relics)
+    assert timing["packing"]["summary"] > 0
+    assert timing["packing"]["dropped"] == 0 and timing["packing"]["truncated"] == 0
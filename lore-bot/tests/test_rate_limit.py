@@ -0,0 +1,65 @@
+"""TokenBucketLimiter: bursts, refill timing, 429 + Retry-After, and the cap on tracked clients."""
+
+import pytest
+from fastapi import HTTPException
+
+import server
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(server.time, "monotonic", clock)
+    return clock
+
+
+def test_bucket_refills_after_the_expected_interval(clock):
+    limiter = server.TokenBucketLimiter("chat", "6:2")  # one token every 10s, bursts of 2
+    assert limiter.check("a") == 0 and limiter.check("a") == 0
+    assert limiter.check("a") == pytest.approx(10.0)
+
+    clock.now += 9.5
+    assert limiter.check("a") == pytest.approx(0.5)
+    clock.now += 0.5
+    assert limiter.check("a") == 0
+    # Refill stops at the burst size, however long the client was away.
+    clock.now += 3600
+    waits = [limiter.check("a") for _ in range(3)]
+    assert waits[:2] == [0, 0] and waits[2] == pytest.approx(10.0)
+    assert limiter.stats()["allowed"] == 5 and limiter.stats()["rejected"] == 3
+
+
+def test_rejection_raises_429_with_retry_after(clock, monkeypatch):
+    monkeypatch.setitem(server.rate_limiters, "chat", server.TokenBucketLimiter("chat", "2:1"))
+    server.enforce_rate_limit("chat", "203.0.113.9")
+    with pytest.raises(HTTPException) as rejected:
+        server.enforce_rate_limit("chat", "203.0.113.9")
+    assert rejected.value.status_code == 429
+    assert rejected.value.headers["Retry-After"] == "30"
+    server.enforce_rate_limit("chat", "203.0.113.10")  # other clients are unaffected
+
+
+def test_client_table_never_exceeds_the_cap(clock):
+    limiter = server.TokenBucketLimiter("chat", "60:1", max_clients=3)
+    for n in range(10):
+        limiter.check(f"client-{n}")
+        assert limiter.stats()["tracked_clients"] <= 3
+    assert limiter.stats()["evicted"] == 7
+
+    # Least recently seen goes first: touching client-7 keeps it over client-8.
+    assert limiter.check("client-7") > 0
+    limiter.check("client-new")
+    assert limiter.check("client-7") > 0
+    assert limiter.check("client-8") == 0  # was evicted, so it starts with a fresh bucket
+
+
+def test_default_cap_comes_from_the_environment():
+    assert server.rate_limiters["chat"].max_clients == server.RATE_LIMIT_MAX_CLIENTS
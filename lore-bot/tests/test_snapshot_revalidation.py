@@ -0,0 +1,84 @@
+"""Booting from the local snapshot, then revalidating against a Supabase whose rows have not changed."""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+import server
+
+
+def make_rows(stamped: bool) -> list[dict]:
+    rng = np.random.default_rng(3)
+    rows = []
+    for i in range(12):
+        row = {"id": str(i), "title": f"Relic {i}", "slug": f"relic-{i}", "category": "Relics", "sort_order": i,
+               "content": f"Relic {i} rests in the vault of the archive.",
+               "embedding": [float(v) for v in rng.standard_normal(16).astype(np.float32)]}
+        if stamped:
+            row[server.DELTA_VERSION_COLUMN] = f"2026-01-{i + 1:02d}"
+        rows.append(row)
+    return rows
+
+
+@pytest.fixture
+def supabase(monkeypatch):
+    """Serves a fixed table in place of PostgREST, honouring only the select list."""
+    table: list[dict] = []
+    requests: list[str] = []
+
+    def iter_supabase_rows(params: dict):
+        requests.append(params["select"])
+        fields = None if "*" in params["select"] else params["select"].split(",")
+        for row in table:
+            yield dict(row) if fields is None else {field: row.get(field) for field in fields}
+
+    monkeypatch.setattr(server, "iter_supabase_rows", iter_supabase_rows)
+    monkeypatch.setattr(server, "fetch_lore_row_count", lambda: len(table))
+    monkeypatch.setattr(server, "corpus", server.LoreCorpus(server.LoreSearchIndex(), "", version=0, source=""))
+    monkeypatch.setattr(server, "_reload_lock", None)
+    for path in (server.SNAPSHOT_ROWS_PATH, server.SNAPSHOT_EMBEDDINGS_PATH,
+                 server.SNAPSHOT_META_PATH, server.SNAPSHOT_DELTA_PATH):
+        path.unlink(missing_ok=True)
+    return table, requests
+
+
+def boot_from_snapshot_and_revalidate() -> None:
+    async def scenario():
+        built = await asyncio.to_thread(server.build_from_snapshot)
+        assert built is not None
+        server.publish_lore_corpus(*built, source="snapshot")
+        server.start_snapshot_revalidation()
+        await server._revalidate_task
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("stamped", [True, False], ids=["delta", "fingerprint"])
+def test_unchanged_supabase_keeps_the_snapshot(supabase, stamped):
+    table, requests = supabase
+    table.extend(make_rows(stamped))
+    server.load_lore_corpus()
+    assert server.SNAPSHOT_META_PATH.exists()
+    requests.clear()
+
+    boot_from_snapshot_and_revalidate()
+    assert server.corpus.source == "snapshot"
+    assert server.corpus.entry_count == len(table)
+    # Stamped rows are diffed by listing ids and stamps; unstamped ones by fingerprinting a full fetch.
+    assert requests == ([f"id,{server.DELTA_VERSION_COLUMN}"] if stamped else [requests[0]])
+    assert stamped or "*" in requests[0]
+
+    status = asyncio.run(server.reload_lore_corpus(unless_fingerprint=server.snapshot_fingerprint))
+    assert status == "unchanged"
+    assert server.corpus.source == "snapshot"
+
+
+def test_changed_supabase_replaces_the_snapshot(supabase):
+    table, _ = supabase
+    table.extend(make_rows(stamped=False))
+    server.load_lore_corpus()
+    table[0] = {**table[0], "content": "Relic 0 was moved to the chapel."}
+
+    boot_from_snapshot_and_revalidate()
+    assert server.corpus.source == "supabase"
+    assert "chapel" in server.corpus.index.entries[0].prompt_block
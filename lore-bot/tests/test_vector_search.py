@@ -0,0 +1,88 @@
+"""search_vector against the original per-entry cosine_similarity loop."""
+
+import random
+
+import numpy as np
+
+import server
+
+
+def cosine_similarity(a: list[float], b: list[float]) -> float:
+    """The pre-matrix implementation, kept verbatim as the reference."""
+    dot = sum(x * y for x, y in zip(a, b))
+    mag_a = sum(x ** 2 for x in a) ** 0.5
+    mag_b = sum(x ** 2 for x in b) ** 0.5
+    return dot / (mag_a * mag_b) if mag_a and mag_b else 0.0
+
+
+def reference_search(rows: list[dict], query_vector: list[float], query: str, top_k: int) -> list[str]:
+    """The original search_vector loop: cosine similarity plus title boost, stable sort."""
+    scores = []
+    for row in rows:
+        score = cosine_similarity(query_vector, row["embedding"])
+        query_words = set(query.lower().split()) - server.TITLE_BOOST_STOP_WORDS
+        title_words = set(row["title"].lower().split())
+        overlap = query_words & title_words
+        if overlap:
+            overlap_ratio = len(overlap) / max(len(title_words), 1)
+            score += 0.3 + (overlap_ratio * 0.3)
+        scores.append((score, row["slug"]))
+    scores.sort(key=lambda x: x[0], reverse=True)
+    return [slug for score, slug in scores if score >= server.MIN_VECTOR_SCORE][:top_k]
+
+
+def make_rows(n: int, dim: int, seed: int) -> list[dict]:
+    """Seeded rows with float32-representable embeddings (pgvector stores float4).
+
+    Every fifth row is a near-copy of an earlier one, so many scores tie to within
+    float32 rounding — the cases where an unrefined float32 product can misorder.
+    """
+    rng = random.Random(seed)
+    vectors = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+    for i in range(5, n, 5):
+        jitter = np.random.default_rng(seed + i).standard_normal(dim).astype(np.float32) * 1e-6
+        vectors[i] = vectors[rng.randrange(i)] + jitter
+    words = ("ash", "vale", "iron", "saint", "crown", "thorn", "keep", "mire")
+    rows = []
+    for i in range(n):
+        title = " ".join(rng.sample(words, rng.randint(1, 3))).title()
+        rows.append({
+            "id": i,
+            "title": title,
+            "slug": f"entry-{i}",
+            "category": "Places",
+            "content": f"{title} content {i}",
+            "embedding": [float(v) for v in vectors[i]],
+        })
+    return rows
+
+
+def test_exact_search_matches_cosine_loop():
+    rows = make_rows(400, 64, seed=11)
+    index, _, _ = server.build_lore_index(rows)
+    rng = np.random.default_rng(3)
+    queries = ["", "who is the iron saint", "tell me about Thorn Keep", "ash vale crown mire"]
+    for i in range(60):
+        base = np.asarray(rows[i * 5 % len(rows)]["embedding"], dtype=np.float32)
+        query_vector = [float(v) for v in (base + rng.standard_normal(base.size).astype(np.float32) * 0.3)]
+        query = queries[i % len(queries)]
+        for top_k in (1, 5, 12):
+            found = [entry.slug for entry in index.search_vector(query_vector, query, top_k, exact=True)]
+            assert found == reference_search(rows, query_vector, query, top_k), (i, query, top_k)
+
+
+def test_threshold_boundary_matches_cosine_loop():
+    rows = make_rows(200, 32, seed=5)
+    index, _, _ = server.build_lore_index(rows)
+    query_vector = rows[0]["embedding"]
+    original = server.MIN_VECTOR_SCORE
+    try:
+        # Put the cut a hair either side of real scores, far inside float32 rounding.
+        for row in rows[:40]:
+            score = cosine_similarity(query_vector, row["embedding"])
+            for cut in (score - 1e-12, score + 1e-12):
+                server.MIN_VECTOR_SCORE = cut
+                found = [entry.slug for entry in index.search_vector(query_vector, "", len(rows), exact=True)]
+                assert found == reference_search(rows, query_vector, "", len(rows))
+    finally:
+        server.MIN_VECTOR_SCORE = original